@@ -3,36 +3,153 @@ import os
 import io
 import base64
 import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
 
+import orjson
+import numpy as np
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import pandas as pd
-import matplotlib.pyplot as plt
+from cachetools import TTLCache
+import xlsxwriter
+import matplotlib
+
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt  # noqa: E402
 from flask import Flask, request, jsonify, send_file
-from weasyprint import HTML
+from flask.json.provider import JSONProvider
+from weasyprint import CSS, HTML
+from weasyprint.text.fonts import FontConfiguration
 
 # Path to SQLite database
 DB_PATH = os.environ.get(
     "WEATHER_DB_PATH", os.path.join(os.path.dirname(__file__), "weather.sqlite3")
 )
 
+
+# --- JSON ---
+class OrjsonProvider(JSONProvider):
+    """Serve jsonify() and request.get_json() through orjson."""
+
+    option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NAIVE_UTC
+
+    def dumps(self, obj, **kwargs) -> str:
+        """Serialize with orjson.
+
+        ``sort_keys`` and ``indent`` are honoured; other ``json.dumps`` keyword
+        arguments have no orjson equivalent and are ignored.
+        """
+        option = self.option
+        if kwargs.get("sort_keys"):
+            option |= orjson.OPT_SORT_KEYS
+        if kwargs.get("indent"):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, option=option).decode("utf-8")
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        # Same argument rules as jsonify(): one value, several as a list, or kwargs
+        if args and kwargs:
+            raise TypeError("jsonify() takes either args or kwargs, not both")
+        if len(args) == 1:
+            obj = args[0]
+        else:
+            obj = args or kwargs or None
+        # Hand orjson's bytes straight to the response, skipping the str round trip
+        return self._app.response_class(
+            orjson.dumps(obj, option=self.option), mimetype="application/json"
+        )
+
+
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
+
+# Chart figure built once and redrawn per request; Agg figures are not reentrant
+CHART_FIG, CHART_AX = plt.subplots(figsize=(10, 5))
+CHART_LOCK = threading.Lock()
+
+# WeasyPrint font discovery and stylesheet parsing done once instead of per render
+FONT_CONFIG = FontConfiguration()
+PDF_STYLE = CSS(
+    font_config=FONT_CONFIG,
+    string=(
+        "body{font-family:Arial,Helvetica,sans-serif;margin:30px}"
+        "h1{margin-bottom:0}"
+        ".meta{color:#333;margin-bottom:20px}"
+        ".footer{font-size:12px;color:#666;margin-top:30px}"
+        "img.chart{width:100%;height:auto}"
+    )
+)
+
+# Shared HTTP session so Open-Meteo calls reuse keep-alive connections
+OPEN_METEO_TIMEOUT = 30
+OPEN_METEO_RETRIES = 3
+SESSION = requests.Session()
+SESSION.mount(
+    "https://",
+    HTTPAdapter(
+        pool_maxsize=16,
+        max_retries=Retry(
+            total=OPEN_METEO_RETRIES,
+            backoff_factor=0.3,
+            status_forcelist=[502, 503, 504],
+            # Hand back the last 5xx so raise_for_status() still maps it to 502
+            raise_on_status=False,
+        ),
+    ),
+)
+SESSION.headers.update({"Accept-Encoding": "gzip"})
 
 
 # --- Database Helpers ---
 def get_conn():
     conn = sqlite3.connect(DB_PATH, detect_types=sqlite3.PARSE_DECLTYPES)
     conn.row_factory = sqlite3.Row
+    # WAL is persisted in the database file; the rest apply per connection.
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA mmap_size=30000000000")
+    conn.execute("PRAGMA cache_size=-20000")
     return conn
 
 
+DAILY_ROLLUP_SQL = """
+    INSERT INTO weather_daily
+    (day, latitude, longitude, t_min, t_avg, t_max, h_avg, samples)
+    SELECT (timestamp / 86400) * 86400 AS day, latitude, longitude,
+           MIN(temperature_2m), AVG(temperature_2m), MAX(temperature_2m),
+           AVG(relative_humidity_2m), COUNT(*)
+    FROM weather
+    WHERE {where}
+    GROUP BY day, latitude, longitude
+    ON CONFLICT (day, latitude, longitude) DO UPDATE SET
+        t_min = excluded.t_min,
+        t_avg = excluded.t_avg,
+        t_max = excluded.t_max,
+        h_avg = excluded.h_avg,
+        samples = excluded.samples
+"""
+
+# Windows longer than this are served from weather_daily instead of hourly rows
+DAILY_THRESHOLD_HOURS = 72
+
+
 def init_db():
     with get_conn() as conn:
+        _migrate_text_timestamps(conn)
         conn.execute(
             """
             CREATE TABLE IF NOT EXISTS weather (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp TEXT NOT NULL,
+                timestamp INTEGER NOT NULL,
                 temperature_2m REAL,
                 relative_humidity_2m REAL,
                 latitude REAL NOT NULL,
@@ -41,26 +158,238 @@ def init_db():
             )
             """
         )
+        # Covering index so query_last_48h is a pure index range scan
+        conn.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_weather_ts_covering ON weather
+            (timestamp, temperature_2m, relative_humidity_2m, latitude, longitude)
+            """
+        )
+        # Per-location range scans for exports filtered by lat/lon
+        conn.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_weather_loc_ts ON weather
+            (latitude, longitude, timestamp)
+            """
+        )
+        # Daily rollups (keyed by UTC midnight epoch) for charting long windows
+        daily_exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'weather_daily'"
+        ).fetchone()
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS weather_daily (
+                day INTEGER NOT NULL,
+                latitude REAL NOT NULL,
+                longitude REAL NOT NULL,
+                t_min REAL,
+                t_avg REAL,
+                t_max REAL,
+                h_avg REAL,
+                samples INTEGER NOT NULL,
+                PRIMARY KEY (day, latitude, longitude)
+            )
+            """
+        )
+        if not daily_exists:
+            conn.execute(DAILY_ROLLUP_SQL.format(where="1"))
+        conn.execute("ANALYZE")
         conn.commit()
 
 
+def _migrate_text_timestamps(conn):
+    """One-time rewrite of ISO TEXT timestamps into INTEGER epoch seconds."""
+    cols = {
+        row["name"]: row["type"] for row in conn.execute("PRAGMA table_info(weather)")
+    }
+    if cols.get("timestamp", "").upper() != "TEXT":
+        return
+    conn.executescript(
+        """
+        BEGIN;
+        CREATE TABLE weather_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp INTEGER NOT NULL,
+            temperature_2m REAL,
+            relative_humidity_2m REAL,
+            latitude REAL NOT NULL,
+            longitude REAL NOT NULL,
+            UNIQUE (timestamp, latitude, longitude)
+        );
+        INSERT OR REPLACE INTO weather_new
+            (id, timestamp, temperature_2m, relative_humidity_2m, latitude, longitude)
+        SELECT id, CAST(strftime('%s', timestamp) AS INTEGER),
+               temperature_2m, relative_humidity_2m, latitude, longitude
+        FROM weather;
+        DROP TABLE weather;
+        ALTER TABLE weather_new RENAME TO weather;
+        COMMIT;
+        """
+    )
+
+
 init_db()
 
 
 # --- Open-Meteo Fetch ---
+OPEN_METEO_URL = "https://api.open-meteo.com/v1/forecast"
+OPEN_METEO_PARAMS = {
+    "hourly": "temperature_2m,relative_humidity_2m",
+    "past_days": 2,
+    "timezone": "UTC",
+}
+
+# Cached hourly frames keyed by rounded (lat, lon); values are (fetched_at, etag, df).
+# Entries younger than FETCH_FRESH_SECONDS are served directly; older ones are
+# revalidated with If-None-Match until the cache TTL evicts them.
+FETCH_FRESH_SECONDS = 300
+_fetch_cache = TTLCache(maxsize=1024, ttl=600)
+_fetch_cache_lock = threading.Lock()
+
+# Cache misses arriving within FETCH_BATCH_WINDOW seconds share one Open-Meteo
+# call. The first caller of a window waits it out, then fetches for everyone.
+# Followers give up after every attempt of that call could have timed out.
+FETCH_BATCH_WINDOW = 0.1
+FETCH_RESULT_TIMEOUT = (
+    FETCH_BATCH_WINDOW + (OPEN_METEO_RETRIES + 2) * OPEN_METEO_TIMEOUT
+)
+_batch_pending = None
+_batch_lock = threading.Lock()
+
+
 def fetch_open_meteo(lat: float, lon: float) -> pd.DataFrame:
-    url = "https://api.open-meteo.com/v1/forecast"
+    if not valid_coordinates(lat, lon):
+        raise ValueError("lat must be within [-90, 90] and lon within [-180, 180].")
+
+    key = (round(lat, 3), round(lon, 3))
+    with _fetch_cache_lock:
+        cached = _fetch_cache.get(key)
+
+    if cached is not None and time.monotonic() - cached[0] < FETCH_FRESH_SECONDS:
+        hourly_df = cached[2]
+    elif cached is not None and cached[1]:
+        hourly_df = _revalidate(key, cached)
+    else:
+        hourly_df = _fetch_batched(key)
+
+    df = hourly_df.copy()
+    df["latitude"] = float(lat)
+    df["longitude"] = float(lon)
+    return df
+
+
+def valid_coordinates(lat: float, lon: float) -> bool:
+    return -90 <= lat <= 90 and -180 <= lon <= 180
+
+
+def _revalidate(key, cached) -> pd.DataFrame:
+    params = {"latitude": key[0], "longitude": key[1], **OPEN_METEO_PARAMS}
+    r = SESSION.get(
+        OPEN_METEO_URL,
+        params=params,
+        headers={"If-None-Match": cached[1]},
+        timeout=OPEN_METEO_TIMEOUT,
+    )
+    if r.status_code == 304:
+        hourly_df, etag = cached[2], cached[1]
+    else:
+        r.raise_for_status()
+        hourly_df = _parse_hourly(orjson.loads(r.content))
+        etag = r.headers.get("ETag")
+    with _fetch_cache_lock:
+        _fetch_cache[key] = (time.monotonic(), etag, hourly_df)
+    return hourly_df
+
+
+def _fetch_batched(key) -> pd.DataFrame:
+    global _batch_pending
+    with _batch_lock:
+        leader = _batch_pending is None
+        if leader:
+            _batch_pending = {}
+        future = _batch_pending.setdefault(key, Future())
+
+    if leader:
+        try:
+            time.sleep(FETCH_BATCH_WINDOW)
+        finally:
+            with _batch_lock:
+                batch, _batch_pending = _batch_pending, None
+        _resolve_batch(batch)
+
+    hourly_df = future.result(timeout=FETCH_RESULT_TIMEOUT)
+    if hourly_df is None:
+        # The batched call was rejected (4xx or unparsable body); retry this key
+        # on its own so a bad key in the same window cannot fail it.
+        hourly_df = _fetch_locations([key])[key]
+        if isinstance(hourly_df, Exception):
+            raise hourly_df
+    return hourly_df
+
+
+def _resolve_batch(batch: dict):
+    keys = list(batch)
+    try:
+        results = _fetch_locations(keys)
+    except Exception as e:
+        if len(keys) == 1 or not _blames_request(e):
+            # Transport errors and 5xx would hit every key again; fail them all
+            for f in batch.values():
+                f.set_exception(e)
+            return
+        results = dict.fromkeys(keys)
+
+    for k, f in batch.items():
+        if isinstance(results[k], Exception):
+            f.set_exception(results[k])
+        else:
+            f.set_result(results[k])
+
+
+def _blames_request(e: Exception) -> bool:
+    """True if a batched call failed because of what was asked (4xx, bad body)."""
+    if isinstance(e, requests.HTTPError):
+        return e.response is not None and 400 <= e.response.status_code < 500
+    return isinstance(e, ValueError) and not isinstance(e, requests.RequestException)
+
+
+def _fetch_locations(keys) -> dict:
+    """Fetch hourly frames for several (lat, lon) keys in one Open-Meteo call.
+
+    Raises if the call itself fails; an entry that fails to parse maps to its
+    exception so it only affects its own key.
+    """
     params = {
-        "latitude": lat,
-        "longitude": lon,
-        "hourly": "temperature_2m,relative_humidity_2m",
-        "past_days": 2,
-        "timezone": "UTC",
+        "latitude": ",".join(str(k[0]) for k in keys),
+        "longitude": ",".join(str(k[1]) for k in keys),
+        **OPEN_METEO_PARAMS,
     }
-    r = requests.get(url, params=params, timeout=30)
+    r = SESSION.get(OPEN_METEO_URL, params=params, timeout=OPEN_METEO_TIMEOUT)
     r.raise_for_status()
-    data = r.json()
-
+    data = orjson.loads(r.content)
+    # Open-Meteo returns a bare object for one location and a list for several
+    if isinstance(data, dict):
+        data = [data]
+    if len(data) != len(keys):
+        raise ValueError("Open-Meteo response missing expected locations.")
+
+    # An ETag for a multi-location response cannot revalidate a single key
+    etag = r.headers.get("ETag") if len(keys) == 1 else None
+    now = time.monotonic()
+    results = {}
+    for k, entry in zip(keys, data):
+        try:
+            hourly_df = _parse_hourly(entry)
+        except Exception as e:
+            results[k] = e
+            continue
+        results[k] = hourly_df
+        with _fetch_cache_lock:
+            _fetch_cache[k] = (now, etag, hourly_df)
+    return results
+
+
+def _parse_hourly(data: dict) -> pd.DataFrame:
     hourly = data.get("hourly", {})
     times = hourly.get("time", [])
     temps = hourly.get("temperature_2m", [])
@@ -69,61 +398,145 @@ def fetch_open_meteo(lat: float, lon: float) -> pd.DataFrame:
     if not (times and temps and hums):
         raise ValueError("Open-Meteo response missing expected hourly data.")
 
-    df = pd.DataFrame(
+    ts = pd.to_datetime(times, format="%Y-%m-%dT%H:%M", utc=True, cache=True)
+    # Open-Meteo returns hourly series already in chronological order.
+    assert np.all(np.diff(ts.asi8) >= 0), "Open-Meteo hourly times not sorted"
+
+    return pd.DataFrame(
         {
-            "timestamp": pd.to_datetime(times, utc=True),
-            "temperature_2m": temps,
-            "relative_humidity_2m": hums,
+            "timestamp": ts,
+            "temperature_2m": np.asarray(temps, dtype=np.float64),
+            "relative_humidity_2m": np.asarray(hums, dtype=np.float64),
         }
-    ).sort_values("timestamp")
-
-    df["latitude"] = float(lat)
-    df["longitude"] = float(lon)
-    return df
+    )
 
 
 # --- DB Insert/Query ---
 def upsert_records(df: pd.DataFrame) -> int:
+    if df.empty:
+        return 0
+    ts = df["timestamp"].dt.as_unit("s").astype("int64").tolist()
+    rows = list(
+        zip(
+            ts,
+            df["temperature_2m"].to_numpy(dtype=np.float64).tolist(),
+            df["relative_humidity_2m"].to_numpy(dtype=np.float64).tolist(),
+            df["latitude"].to_numpy(dtype=np.float64).tolist(),
+            df["longitude"].to_numpy(dtype=np.float64).tolist(),
+        )
+    )
     with get_conn() as conn:
         cur = conn.cursor()
-        rows = 0
-        for _, row in df.iterrows():
-            cur.execute(
-                """
-                INSERT OR REPLACE INTO weather
-                (timestamp, temperature_2m, relative_humidity_2m, latitude, longitude)
-                VALUES (?, ?, ?, ?, ?)
-                """,
-                (
-                    row["timestamp"].strftime("%Y-%m-%dT%H:%M:%SZ"),
-                    float(row["temperature_2m"]),
-                    float(row["relative_humidity_2m"]),
-                    float(row["latitude"]),
-                    float(row["longitude"]),
-                ),
-            )
-            rows += 1
+        conn.execute("BEGIN")
+        cur.executemany(
+            """
+            INSERT OR REPLACE INTO weather
+            (timestamp, temperature_2m, relative_humidity_2m, latitude, longitude)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            rows,
+        )
+        upserted = cur.rowcount
+        # Recompute the daily rollups for every day touched by this batch
+        day_start = min(ts) // 86400 * 86400
+        day_end = max(ts) // 86400 * 86400 + 86400
+        conn.executemany(
+            DAILY_ROLLUP_SQL.format(
+                where="latitude = ? AND longitude = ? "
+                "AND timestamp >= ? AND timestamp < ?"
+            ),
+            [
+                (lat, lon, day_start, day_end)
+                for lat, lon in set(zip(df["latitude"], df["longitude"]))
+            ],
+        )
         conn.commit()
-        return rows
+        return upserted
 
 
-def query_last_48h() -> pd.DataFrame:
-    cutoff = (datetime.now(timezone.utc) - timedelta(hours=48)).strftime(
-        "%Y-%m-%dT%H:%M:%SZ"
-    )
-    with get_conn() as conn:
-        df = pd.read_sql_query(
-            """
-            SELECT timestamp, temperature_2m, relative_humidity_2m, latitude, longitude
-            FROM weather
-            WHERE timestamp >= ?
-            ORDER BY timestamp ASC
-            """,
-            conn,
-            params=(cutoff,),
-            parse_dates=["timestamp"],
+@dataclass
+class WeatherSeries:
+    """Column arrays for a window of stored readings; timestamps are epoch seconds."""
+
+    timestamp: np.ndarray
+    temperature_2m: np.ndarray
+    relative_humidity_2m: np.ndarray
+    latitude: np.ndarray
+    longitude: np.ndarray
+
+    @property
+    def empty(self) -> bool:
+        return self.timestamp.size == 0
+
+    def datetimes(self) -> np.ndarray:
+        return self.timestamp.astype("datetime64[s]")
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame(
+            {
+                "timestamp": pd.to_datetime(self.timestamp, unit="s", utc=True),
+                "temperature_2m": self.temperature_2m,
+                "relative_humidity_2m": self.relative_humidity_2m,
+                "latitude": self.latitude,
+                "longitude": self.longitude,
+            }
         )
-    return df
+
+
+def query_series(hours: int, lat: float = None, lon: float = None) -> WeatherSeries:
+    """Readings from the last ``hours``; long windows use one row per day.
+
+    When ``lat``/``lon`` are given only that location's rows are returned.
+    """
+    cutoff = int((datetime.now(timezone.utc) - timedelta(hours=hours)).timestamp())
+    if hours > DAILY_THRESHOLD_HOURS:
+        table, ts_col, temp_col, hum_col = "weather_daily", "day", "t_avg", "h_avg"
+        cutoff = cutoff // 86400 * 86400
+    else:
+        table, ts_col = "weather", "timestamp"
+        temp_col, hum_col = "temperature_2m", "relative_humidity_2m"
+    where, params = f"{ts_col} >= ?", [cutoff]
+    if lat is not None and lon is not None:
+        where += " AND latitude = ? AND longitude = ?"
+        params += [lat, lon]
+    sql = f"""
+        SELECT {ts_col}, {temp_col}, {hum_col}, latitude, longitude
+        FROM {table}
+        WHERE {where}
+        ORDER BY {ts_col} ASC
+        """
+    with get_conn() as conn:
+        rows = conn.execute(sql, params).fetchall()
+    cols = list(zip(*rows)) if rows else [()] * 5
+    return WeatherSeries(
+        timestamp=np.asarray(cols[0], dtype=np.int64),
+        temperature_2m=np.asarray(cols[1], dtype=np.float64),
+        relative_humidity_2m=np.asarray(cols[2], dtype=np.float64),
+        latitude=np.asarray(cols[3], dtype=np.float64),
+        longitude=np.asarray(cols[4], dtype=np.float64),
+    )
+
+
+def query_last_48h(lat: float = None, lon: float = None) -> WeatherSeries:
+    return query_series(48, lat, lon)
+
+
+# Upper bound for the ?hours= window accepted by the chart endpoints (one year)
+MAX_WINDOW_HOURS = 24 * 366
+HOURS_ERROR = f"hours must be an integer between 1 and {MAX_WINDOW_HOURS}"
+
+
+def _hours_arg(default: int = 48):
+    """Parse the optional ?hours= window; returns None when it is invalid."""
+    try:
+        hours = int(request.args.get("hours", default))
+    except (TypeError, ValueError):
+        return None
+    return hours if 0 < hours <= MAX_WINDOW_HOURS else None
+
+
+def _format_epoch(seconds, fmt: str) -> str:
+    return datetime.fromtimestamp(int(seconds), tz=timezone.utc).strftime(fmt)
 
 
 # --- Flask Routes ---
@@ -134,6 +547,8 @@ def weather_report():
         lon = float(request.args.get("lon"))
     except (TypeError, ValueError):
         return jsonify({"error": "Please provide numeric lat & lon query params"}), 400
+    if not valid_coordinates(lat, lon):
+        return jsonify({"error": "lat/lon out of range"}), 400
 
     try:
         df = fetch_open_meteo(lat, lon)
@@ -153,19 +568,83 @@ def weather_report():
         return jsonify({"error": str(e)}), 500
 
 
+@app.get("/")
+def index():
+    return app.send_static_file("index.html")
+
+
+@app.get("/export/csv")
+def export_csv():
+    series = query_last_48h()
+    if series.empty:
+        return (
+            jsonify({"error": "No data available. Call /weather-report first."}),
+            400,
+        )
+
+    out = series.to_frame()[["timestamp", "temperature_2m", "relative_humidity_2m"]]
+    buf = io.BytesIO(
+        out.to_csv(index=False, date_format="%Y-%m-%dT%H:%M:%SZ").encode("utf-8")
+    )
+    return send_file(
+        buf,
+        mimetype="text/csv",
+        as_attachment=True,
+        download_name="weather_last_48h.csv",
+    )
+
+
+@app.get("/export/series.json")
+def export_series_json():
+    hours = _hours_arg()
+    if hours is None:
+        return jsonify({"error": HOURS_ERROR}), 400
+
+    series = query_series(hours)
+    return jsonify(
+        {
+            "t": series.timestamp,
+            "temp": series.temperature_2m,
+            "hum": series.relative_humidity_2m,
+        }
+    )
+
+
+def _nan_to_none(values: np.ndarray) -> list:
+    """Missing readings become None so they are written as blank cells."""
+    return np.where(np.isnan(values), None, values).tolist()
+
+
 @app.get("/export/excel")
 def export_excel():
-    df = query_last_48h()
-    if df.empty:
+    series = query_last_48h()
+    if series.empty:
         return (
             jsonify({"error": "No data available. Call /weather-report first."}),
             400,
         )
 
-    out = df[["timestamp", "temperature_2m", "relative_humidity_2m"]].copy()
+    # Rows are streamed in order, which constant_memory mode requires. Excel has
+    # no timezone support, so timestamps are written as naive UTC.
     buf = io.BytesIO()
-    with pd.ExcelWriter(buf, engine="openpyxl") as writer:
-        out.to_excel(writer, sheet_name="last_48_hours", index=False)
+    workbook = xlsxwriter.Workbook(
+        buf,
+        {
+            "constant_memory": True,
+            "strings_to_urls": False,
+            "default_date_format": "yyyy-mm-dd hh:mm:ss",
+        },
+    )
+    sheet = workbook.add_worksheet("last_48_hours")
+    sheet.write_row(0, 0, ("timestamp", "temperature_2m", "relative_humidity_2m"))
+    rows = zip(
+        series.datetimes().tolist(),
+        _nan_to_none(series.temperature_2m),
+        _nan_to_none(series.relative_humidity_2m),
+    )
+    for i, row in enumerate(rows, start=1):
+        sheet.write_row(i, 0, row)
+    workbook.close()
     buf.seek(0)
 
     return send_file(
@@ -176,36 +655,63 @@ def export_excel():
     )
 
 
+def _draw_chart(times, series: WeatherSeries, title: str):
+    """Redraw the shared chart figure; callers must hold CHART_LOCK."""
+    ax = CHART_AX
+    ax.clear()
+    ax.plot(times, series.temperature_2m, label="Temperature (°C)")
+    ax.plot(times, series.relative_humidity_2m, label="Humidity (%)")
+    ax.set_xlabel("Time (UTC)")
+    ax.set_ylabel("Value")
+    ax.set_title(title)
+    ax.legend(loc="best")
+    ax.grid(True, linestyle="--", linewidth=0.5)
+    CHART_FIG.tight_layout()
+
+
 @app.get("/export/pdf")
 def export_pdf():
-    df = query_last_48h()
-    if df.empty:
+    lat, lon = request.args.get("lat"), request.args.get("lon")
+    if (lat is None) != (lon is None):
+        return jsonify({"error": "Please provide both lat & lon, or neither"}), 400
+    if lat is not None:
+        try:
+            lat, lon = float(lat), float(lon)
+        except ValueError:
+            return jsonify({"error": "Please provide numeric lat & lon query params"}), 400
+        if not valid_coordinates(lat, lon):
+            return jsonify({"error": "lat/lon out of range"}), 400
+
+    hours = _hours_arg()
+    if hours is None:
+        return jsonify({"error": HOURS_ERROR}), 400
+
+    series = query_series(hours, lat, lon)
+    if series.empty:
         return (
             jsonify({"error": "No data available. Call /weather-report first."}),
             400,
         )
 
-    # --- Chart ---
-    fig, ax = plt.subplots(figsize=(10, 5))
-    ax.plot(df["timestamp"], df["temperature_2m"], label="Temperature (°C)")
-    ax.plot(df["timestamp"], df["relative_humidity_2m"], label="Humidity (%)")
-    ax.set_xlabel("Time (UTC)")
-    ax.set_ylabel("Value")
-    ax.set_title("Temperature & Humidity - Last 48 Hours")
-    ax.legend(loc="best")
-    ax.grid(True, linestyle="--", linewidth=0.5)
+    times = series.datetimes()
 
+    # --- Chart ---
     img_buf = io.BytesIO()
-    fig.tight_layout()
-    fig.savefig(img_buf, format="png", dpi=180, bbox_inches="tight")
-    plt.close(fig)
+    with CHART_LOCK:
+        _draw_chart(times, series, f"Temperature & Humidity - Last {hours} Hours")
+        # SVG is embedded as vector content, avoiding WeasyPrint raster re-encoding
+        CHART_FIG.savefig(img_buf, format="svg", bbox_inches="tight")
     img_buf.seek(0)
     img_b64 = base64.b64encode(img_buf.read()).decode("ascii")
 
-    start_ts = df["timestamp"].min().strftime("%Y-%m-%d %H:%M UTC")
-    end_ts = df["timestamp"].max().strftime("%Y-%m-%d %H:%M UTC")
-    lat = df["latitude"].mode().iloc[0] if "latitude" in df else None
-    lon = df["longitude"].mode().iloc[0] if "longitude" in df else None
+    start_ts = _format_epoch(series.timestamp.min(), "%Y-%m-%d %H:%M UTC")
+    end_ts = _format_epoch(series.timestamp.max(), "%Y-%m-%d %H:%M UTC")
+    if lat is None or lon is None:
+        # No location requested: label it only if the data holds a single one
+        coords = np.column_stack((series.latitude, series.longitude))
+        locations = np.unique(coords, axis=0)
+        if len(locations) == 1:
+            lat, lon = locations[0]
     location_text = (
         f"Lat: {lat:.4f}, Lon: {lon:.4f}" if lat is not None and lon is not None else "Location: N/A"
     )
@@ -216,13 +722,6 @@ def export_pdf():
     <html>
     <head>
       <meta charset="utf-8">
-      <style>
-        body {{ font-family: Arial, Helvetica, sans-serif; margin: 30px; }}
-        h1 {{ margin-bottom: 0; }}
-        .meta {{ color: #333; margin-bottom: 20px; }}
-        .footer {{ font-size: 12px; color: #666; margin-top: 30px; }}
-        img.chart {{ width: 100%; height: auto; }}
-      </style>
       <title>Weather Report</title>
     </head>
     <body>
@@ -232,7 +731,7 @@ def export_pdf():
         <div>Date Range: {start_ts} — {end_ts}</div>
         <div>Generated: {datetime.utcnow().strftime('%Y-%m-%d %H:%M UTC')}</div>
       </div>
-      <img class="chart" src="data:image/png;base64,{img_b64}" alt="Chart"/>
+      <img class="chart" src="data:image/svg+xml;base64,{img_b64}" alt="Chart"/>
       <div class="footer">Data source: Open-Meteo (https://open-meteo.com)</div>
     </body>
     </html>
@@ -240,34 +739,23 @@ def export_pdf():
 
     # Prefer WeasyPrint, fallback to Matplotlib PDF
     try:
-        pdf_bytes = HTML(string=html).write_pdf()
+        pdf_bytes = HTML(string=html).write_pdf(
+            stylesheets=[PDF_STYLE],
+            font_config=FONT_CONFIG,
+            optimize_images=True,
+            presentational_hints=False,
+        )
     except Exception:
-        from matplotlib.backends.backend_pdf import PdfPages
-
+        # Single-page chart PDF from the shared figure, no extra figures built
         buf = io.BytesIO()
-        with PdfPages(buf) as pdf:
-            # metadata page
-            fig_meta = plt.figure(figsize=(8.27, 11.69))  # A4
-            fig_meta.text(0.5, 0.9, "Weather Report", ha="center", fontsize=20)
-            fig_meta.text(0.1, 0.8, f"Location: {location_text}", fontsize=12)
-            fig_meta.text(0.1, 0.78, f"Date Range: {start_ts} — {end_ts}", fontsize=12)
-            pdf.savefig(fig_meta)
-            plt.close(fig_meta)
-
-            # chart page
-            fig_chart, ax = plt.subplots(figsize=(11, 5))
-            ax.plot(df["timestamp"], df["temperature_2m"], label="Temperature (°C)")
-            ax.plot(df["timestamp"], df["relative_humidity_2m"], label="Humidity (%)")
-            ax.set_xlabel("Time (UTC)")
-            ax.set_ylabel("Value")
-            ax.set_title("Temperature & Humidity - Last 48 Hours")
-            ax.legend()
-            ax.grid(True, linestyle="--", linewidth=0.5)
-            pdf.savefig(fig_chart)
-            plt.close(fig_chart)
-
-        buf.seek(0)
-        pdf_bytes = buf.read()
+        with CHART_LOCK:
+            _draw_chart(
+                times,
+                series,
+                f"Weather Report - {location_text}\nDate Range: {start_ts} — {end_ts}",
+            )
+            CHART_FIG.savefig(buf, format="pdf", bbox_inches="tight")
+        pdf_bytes = buf.getvalue()
 
     return send_file(
         io.BytesIO(pdf_bytes),
@@ -278,6 +766,7 @@ def export_pdf():
 
 
 # --- Run ---
+# Local development only; production runs under gunicorn (see Dockerfile).
 if __name__ == "__main__":
     host = os.environ.get("FLASK_HOST", "0.0.0.0")
     port = int(os.environ.get("FLASK_PORT", "5000"))
@@ -0,0 +1,20 @@
+import importlib
+
+import pytest
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    path = tmp_path / "weather.sqlite3"
+    monkeypatch.setenv("WEATHER_DB_PATH", str(path))
+    return path
+
+
+@pytest.fixture
+def app_module(db_path):
+    """Fresh import of app bound to a temporary database."""
+    import app
+
+    module = importlib.reload(app)
+    yield module
+    module.plt.close(module.CHART_FIG)
@@ -0,0 +1,144 @@
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+
+def _frame(start, hours, temps, hums=None, lat=12.5, lon=77.5):
+    return pd.DataFrame(
+        {
+            "timestamp": pd.date_range(start=start, periods=hours, freq="h", tz="UTC"),
+            "temperature_2m": np.asarray(temps, dtype=np.float64),
+            "relative_humidity_2m": np.asarray(
+                hums if hums is not None else np.full(hours, 50.0), dtype=np.float64
+            ),
+            "latitude": lat,
+            "longitude": lon,
+        }
+    )
+
+
+def _daily_rows(db_path):
+    with sqlite3.connect(db_path) as conn:
+        return conn.execute(
+            """
+            SELECT day, t_min, t_avg, t_max, h_avg, samples
+            FROM weather_daily ORDER BY day
+            """
+        ).fetchall()
+
+
+def test_upsert_empty_frame_returns_zero(app_module):
+    assert app_module.upsert_records(_frame("2024-01-01", 0, [])) == 0
+
+
+def test_daily_rollup_stays_correct_after_overlapping_upserts(app_module, db_path):
+    # Two full days, then re-send the last 12 hours of day one and the first
+    # 12 hours of day two with new values.
+    first = _frame("2024-01-01", 48, np.arange(48), np.arange(48) + 10)
+    second = _frame("2024-01-01T12:00", 24, np.arange(24) * 3, np.arange(24) + 100)
+    app_module.upsert_records(first)
+    app_module.upsert_records(second)
+
+    final = pd.concat([first, second]).drop_duplicates("timestamp", keep="last")
+    day = final["timestamp"].dt.floor("D")
+    expected = final.groupby(day).agg(
+        t_min=("temperature_2m", "min"),
+        t_avg=("temperature_2m", "mean"),
+        t_max=("temperature_2m", "max"),
+        h_avg=("relative_humidity_2m", "mean"),
+        samples=("temperature_2m", "size"),
+    )
+
+    rows = _daily_rows(db_path)
+    assert [r[0] for r in rows] == [int(d.timestamp()) for d in expected.index]
+    for row, (_, exp) in zip(rows, expected.iterrows()):
+        assert row[1:5] == tuple(
+            float(exp[c]) for c in ("t_min", "t_avg", "t_max", "h_avg")
+        )
+        assert row[5] == exp["samples"] == 24
+
+
+def test_series_json_long_window_returns_one_row_per_day(app_module):
+    now = pd.Timestamp.now(tz="UTC").floor("h")
+    hours = 150
+    df = _frame(now - pd.Timedelta(hours=hours - 1), hours, np.arange(hours))
+    app_module.upsert_records(df)
+
+    body = app_module.app.test_client().get("/export/series.json?hours=200").get_json()
+
+    ts = df["timestamp"].dt.as_unit("s").astype("int64")
+    days = sorted(set((ts // 86400 * 86400).tolist()))
+    assert body["t"] == days
+    assert len(body["temp"]) == len(body["hum"]) == len(days)
+
+
+def test_series_json_rejects_bad_hours(app_module):
+    client = app_module.app.test_client()
+    assert client.get("/export/series.json?hours=0").status_code == 400
+    assert client.get("/export/series.json?hours=abc").status_code == 400
+
+
+def _make_text_timestamp_db(path):
+    with sqlite3.connect(path) as conn:
+        conn.execute(
+            """
+            CREATE TABLE weather (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                timestamp TEXT NOT NULL,
+                temperature_2m REAL,
+                relative_humidity_2m REAL,
+                latitude REAL NOT NULL,
+                longitude REAL NOT NULL,
+                UNIQUE (timestamp, latitude, longitude)
+            )
+            """
+        )
+        conn.executemany(
+            """
+            INSERT INTO weather
+            (timestamp, temperature_2m, relative_humidity_2m, latitude, longitude)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            [
+                ("2024-01-01T00:00:00Z", 1.5, 60.0, 12.5, 77.5),
+                ("2024-01-01T01:00:00Z", 2.5, 61.0, 12.5, 77.5),
+                ("2024-01-02T23:00:00Z", 3.5, 62.0, 40.0, -3.0),
+            ],
+        )
+
+
+def _snapshot(path):
+    with sqlite3.connect(path) as conn:
+        return (
+            conn.execute("PRAGMA table_info(weather)").fetchall(),
+            conn.execute("SELECT * FROM weather ORDER BY id").fetchall(),
+            conn.execute("SELECT * FROM weather_daily ORDER BY day").fetchall(),
+            conn.execute("SELECT name, sql FROM sqlite_master ORDER BY name").fetchall(),
+        )
+
+
+def test_init_db_migrates_text_timestamps_once(db_path, request):
+    _make_text_timestamp_db(db_path)
+
+    # Importing app runs init_db() against the legacy database
+    app_module = request.getfixturevalue("app_module")
+
+    columns, rows, daily, _ = migrated = _snapshot(db_path)
+    assert {c[1]: c[2] for c in columns}["timestamp"] == "INTEGER"
+    assert [(r[0], r[1]) for r in rows] == [
+        (1, 1704067200),
+        (2, 1704070800),
+        (3, 1704236400),
+    ]
+    assert [r[2:] for r in rows] == [
+        (1.5, 60.0, 12.5, 77.5),
+        (2.5, 61.0, 12.5, 77.5),
+        (3.5, 62.0, 40.0, -3.0),
+    ]
+    # The daily rollups are backfilled from the migrated rows
+    assert [(r[0], r[-1]) for r in daily] == [(1704067200, 2), (1704153600, 1)]
+
+    app_module.init_db()
+
+    assert _snapshot(db_path) == migrated
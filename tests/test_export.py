@@ -0,0 +1,51 @@
+import io
+
+import numpy as np
+import openpyxl
+import pandas as pd
+import pytest
+
+
+def test_export_excel_round_trip(app_module):
+    now = pd.Timestamp.now(tz="UTC").floor("h")
+    n = 40
+    temps = np.arange(n, dtype=np.float64) / 2
+    hums = np.arange(n, dtype=np.float64) + 40
+    df = pd.DataFrame(
+        {
+            "timestamp": pd.date_range(end=now, periods=n, freq="h"),
+            "temperature_2m": temps,
+            "relative_humidity_2m": hums,
+            "latitude": 12.5,
+            "longitude": 77.5,
+        }
+    )
+    app_module.upsert_records(df)
+
+    resp = app_module.app.test_client().get("/export/excel")
+    assert resp.status_code == 200
+
+    sheet = openpyxl.load_workbook(io.BytesIO(resp.data)).active
+    rows = list(sheet.iter_rows(values_only=True))
+    assert rows[0] == ("timestamp", "temperature_2m", "relative_humidity_2m")
+    assert len(rows) == n + 1
+    assert [r[1] for r in rows[1:]] == temps.tolist()
+    assert [r[2] for r in rows[1:]] == hums.tolist()
+    assert all(r[0] is not None for r in rows[1:])
+
+
+@pytest.mark.parametrize(
+    "query, error",
+    [
+        ("lat=12.5", "Please provide both lat & lon, or neither"),
+        ("lon=77.5", "Please provide both lat & lon, or neither"),
+        ("lat=abc&lon=77.5", "Please provide numeric lat & lon query params"),
+        ("lat=nan&lon=77.5", "lat/lon out of range"),
+        ("lat=inf&lon=77.5", "lat/lon out of range"),
+        ("lat=12.5&lon=181", "lat/lon out of range"),
+    ],
+)
+def test_export_pdf_rejects_bad_location(app_module, query, error):
+    resp = app_module.app.test_client().get(f"/export/pdf?{query}")
+    assert resp.status_code == 400
+    assert resp.get_json() == {"error": error}
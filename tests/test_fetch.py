@@ -0,0 +1,195 @@
+import threading
+import time
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import orjson
+import pytest
+import requests
+
+
+def test_weather_report_maps_exhausted_5xx_retries_to_502(app_module, monkeypatch):
+    hits = []
+
+    class Unavailable(BaseHTTPRequestHandler):
+        def do_GET(self):
+            hits.append(self.path)
+            self.send_response(503)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), Unavailable)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        monkeypatch.setattr(
+            app_module, "OPEN_METEO_URL", f"http://127.0.0.1:{server.server_port}/"
+        )
+        app_module.SESSION.mount("http://", app_module.SESSION.get_adapter("https://"))
+
+        resp = app_module.app.test_client().get("/weather-report?lat=10&lon=20")
+    finally:
+        server.shutdown()
+
+    assert resp.status_code == 502
+    assert "Open-Meteo HTTP error" in resp.get_json()["error"]
+    assert len(hits) == app_module.OPEN_METEO_RETRIES + 1
+
+
+def _hourly(lat):
+    return {
+        "latitude": lat,
+        "hourly": {
+            "time": ["2024-01-01T00:00", "2024-01-01T01:00"],
+            "temperature_2m": [lat, lat + 1],
+            "relative_humidity_2m": [50, 51],
+        },
+    }
+
+
+def _response(status, body=None):
+    r = requests.Response()
+    r.status_code = status
+    r._content = orjson.dumps(body) if body is not None else b""
+    r.headers["ETag"] = '"batch"'
+    r.url = "https://api.open-meteo.com/v1/forecast"
+    return r
+
+
+def _stub_session(app_module, monkeypatch, handler):
+    """Route SESSION.get through handler(lats) and record each call's latitudes."""
+    calls = []
+
+    def get(url, params=None, headers=None, timeout=None):
+        lats = [float(v) for v in str(params["latitude"]).split(",")]
+        calls.append(lats)
+        return handler(lats)
+
+    monkeypatch.setattr(app_module.SESSION, "get", get)
+    return calls
+
+
+def _fetch_concurrently(app_module, lats):
+    """Call fetch_open_meteo for each lat at once; map lat -> frame or exception."""
+    results = {}
+    barrier = threading.Barrier(len(lats))
+
+    def run(lat):
+        barrier.wait()
+        try:
+            results[lat] = app_module.fetch_open_meteo(lat, 0.0)
+        except Exception as e:
+            results[lat] = e
+
+    threads = [threading.Thread(target=run, args=(lat,)) for lat in lats]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+
+def test_concurrent_misses_share_one_call(app_module, monkeypatch):
+    calls = _stub_session(
+        app_module, monkeypatch, lambda lats: _response(200, [_hourly(x) for x in lats])
+    )
+
+    results = _fetch_concurrently(app_module, [10.0, 20.0, 30.0])
+
+    assert len(calls) == 1
+    assert sorted(calls[0]) == [10.0, 20.0, 30.0]
+    for lat, df in results.items():
+        assert df["temperature_2m"].tolist() == [lat, lat + 1]
+        assert (df["latitude"] == lat).all()
+    # A multi-location ETag cannot revalidate a single key
+    assert all(entry[1] is None for entry in app_module._fetch_cache.values())
+
+
+def test_bad_key_does_not_fail_others(app_module, monkeypatch):
+    def handler(lats):
+        if 50.0 in lats:
+            return _response(400, {"error": True, "reason": "bad location"})
+        if len(lats) == 1:
+            return _response(200, _hourly(lats[0]))
+        return _response(200, [_hourly(x) for x in lats])
+
+    calls = _stub_session(app_module, monkeypatch, handler)
+
+    results = _fetch_concurrently(app_module, [10.0, 20.0, 50.0])
+
+    assert results[10.0]["temperature_2m"].tolist() == [10.0, 11.0]
+    assert results[20.0]["temperature_2m"].tolist() == [20.0, 21.0]
+    assert isinstance(results[50.0], requests.HTTPError)
+    assert len(calls) == 4  # the batch, then one retry per key
+
+
+def test_bad_entry_only_fails_its_own_key(app_module, monkeypatch):
+    def handler(lats):
+        return _response(200, [_hourly(x) if x != 50.0 else {} for x in lats])
+
+    calls = _stub_session(app_module, monkeypatch, handler)
+
+    results = _fetch_concurrently(app_module, [10.0, 50.0])
+
+    assert results[10.0]["temperature_2m"].tolist() == [10.0, 11.0]
+    assert isinstance(results[50.0], ValueError)
+    assert len(calls) == 1
+
+
+def test_transport_failure_fails_whole_batch_without_retries(app_module, monkeypatch):
+    def handler(lats):
+        raise requests.ConnectionError("upstream down")
+
+    calls = _stub_session(app_module, monkeypatch, handler)
+
+    results = _fetch_concurrently(app_module, [10.0, 20.0, 30.0])
+
+    assert all(isinstance(r, requests.ConnectionError) for r in results.values())
+    assert len(calls) == 1
+
+
+def test_server_error_fails_whole_batch_without_retries(app_module, monkeypatch):
+    calls = _stub_session(app_module, monkeypatch, lambda lats: _response(503))
+
+    results = _fetch_concurrently(app_module, [10.0, 20.0])
+
+    assert all(isinstance(r, requests.HTTPError) for r in results.values())
+    assert len(calls) == 1
+
+
+def test_follower_times_out_when_leader_dies(app_module, monkeypatch):
+    class LeaderDied(BaseException):
+        pass
+
+    leader_in_call = threading.Event()
+
+    def handler(lats):
+        leader_in_call.set()
+        time.sleep(0.2)  # leave the follower waiting on its Future
+        raise LeaderDied()
+
+    _stub_session(app_module, monkeypatch, handler)
+    monkeypatch.setattr(app_module, "FETCH_BATCH_WINDOW", 0.2)
+    monkeypatch.setattr(app_module, "FETCH_RESULT_TIMEOUT", 0.5)
+
+    def leader():
+        try:
+            app_module.fetch_open_meteo(10.0, 0.0)
+        except LeaderDied:
+            pass
+
+    leader_thread = threading.Thread(target=leader)
+    leader_thread.start()
+    time.sleep(0.05)  # join the leader's window as a follower
+
+    started = time.monotonic()
+    with pytest.raises(FutureTimeoutError):
+        app_module.fetch_open_meteo(20.0, 0.0)
+    leader_thread.join()
+
+    assert leader_in_call.is_set()
+    assert time.monotonic() - started < 2
+    # The window was cleared, so the next miss starts a fresh batch
+    assert app_module._batch_pending is None
@@ -0,0 +1,22 @@
+import numpy as np
+import pytest
+
+
+def test_jsonify_serializes_numpy_through_orjson(app_module):
+    with app_module.app.app_context():
+        resp = app_module.jsonify({"t": np.arange(3), "x": np.array([1.5, np.nan])})
+    assert resp.mimetype == "application/json"
+    assert resp.get_data() == b'{"t":[0,1,2],"x":[1.5,null]}'
+
+
+def test_jsonify_argument_forms(app_module):
+    with app_module.app.app_context():
+        assert app_module.jsonify(1, 2).get_data() == b"[1,2]"
+        assert app_module.jsonify(a=1).get_data() == b'{"a":1}'
+        assert app_module.jsonify().get_data() == b"null"
+        with pytest.raises(TypeError):
+            app_module.jsonify(1, a=1)
+
+
+def test_dumps_honours_sort_keys(app_module):
+    assert app_module.app.json.dumps({"b": 1, "a": 2}, sort_keys=True) == '{"a":2,"b":1}'